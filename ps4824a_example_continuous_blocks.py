@@ -1,32 +1,59 @@
 import numpy as np
 from ps4824a_wrapper_blockmode_utils import Picoscope
-import matplotlib.pyplot as plt
-import time
+from multiprocessing import Process, Queue
+import signal
 
-#instantiate a device with its specific serial number:
-my_picoscope = Picoscope(0, serial='IW968/0159', verbose=True)
-# my_picoscope = Picoscope(0, serial=None, verbose=True)
 
+def stats_to_file(q, path):
+    """
+    Writer process: append each (mean, std) row pushed on the queue to a raw float32 binary file,
+    so that the acquisition loop can re-arm the scope without waiting on file I/O.
+    A None item stops the writer.
+    Read the file back with np.fromfile(path, dtype=np.float32).reshape(-1, 2 * n_channels).
+    """
+    # Ctrl+C reaches every process of the console: let the None sentinel drive shutdown so queued rows are drained
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    with open(path, 'ab') as f:
+        while (item := q.get()) is not None:
+            item.tofile(f)
 
 
-my_picoscope.setup_channel('A',channel_range_mv=2000)
-my_picoscope.setup_channel('B',channel_range_mv=2000)
-my_picoscope.setup_block(block_size=10000, block_duration=0.01, pre_trigger_percent=0)
-my_picoscope.setup_trigger('B',trigger_threshold_mv=1500)
+def main():
+    #instantiate a device with its specific serial number:
+    my_picoscope = Picoscope(0, serial='IW968/0159', verbose=True)
+    # my_picoscope = Picoscope(0, serial=None, verbose=True)
 
 
 
+    my_picoscope.setup_channel('A',channel_range_mv=2000)
+    my_picoscope.setup_channel('B',channel_range_mv=2000)
+    my_picoscope.setup_block(block_size=10000, block_duration=0.01, pre_trigger_percent=0)
+    my_picoscope.setup_trigger('B',trigger_threshold_mv=1500)
 
-with my_picoscope:
-    with open('pico.csv', 'a') as f:
+    q = Queue(maxsize=1024)
+    file_write_process = Process(target=stats_to_file, args=(q, 'pico.bin'))
+    file_write_process.start()
+
+    with my_picoscope:
+        # inside the try so that the writer always gets its None sentinel, even if the setup below fails
         try:
+            # mean and std are computed in a worker process while the scope waits for the next trigger
+            my_picoscope.start_stats_worker()
+            my_picoscope.run_block()
             while True:
+                my_picoscope.submit_block_stats()
                 my_picoscope.run_block()
-                buffers = my_picoscope.get_block_traces()
-                traces_value = [val for val in buffers.values()]
-                traces_mean, traces_std = np.mean(traces_value, axis = 1), np.std(traces_value, axis = 1)
+                traces_mean, traces_std = my_picoscope.get_block_stats()
                 print('Trace mean: ', traces_mean, '\nTrace std:', traces_std)
                 print('Waiting for next trace...')
-                np.savetxt(f, [np.concatenate((traces_mean,traces_std))], delimiter = ',')
+                # the queue pickles items in a background thread, so each row must be a fresh array
+                q.put(np.concatenate((traces_mean,traces_std), dtype=np.float32))
         except KeyboardInterrupt:
-            print('Picoscope logging terminated by keyboard interrupt')
\ No newline at end of file
+            print('Picoscope logging terminated by keyboard interrupt')
+        finally:
+            q.put(None)
+            file_write_process.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+import numpy as np
+from ps4824a_wrapper_blockmode_utils import Picoscope
+
+#number of triggered blocks captured per run_block call
+N_CAPTURES = 100
+
+
+def main():
+    #instantiate a device with its specific serial number:
+    my_picoscope = Picoscope(0, serial='IW968/0159', verbose=True)
+    # my_picoscope = Picoscope(0, serial=None, verbose=True)
+
+    my_picoscope.setup_channel('A',channel_range_mv=2000)
+    my_picoscope.setup_channel('B',channel_range_mv=2000)
+    my_picoscope.setup_block(block_size=10000, block_duration=0.01, pre_trigger_percent=0)
+    my_picoscope.setup_trigger('B',trigger_threshold_mv=1500)
+    my_picoscope.setup_rapid_block(N_CAPTURES)
+
+    with my_picoscope:
+        try:
+            while True:
+                my_picoscope.run_block()
+                # (n_captures, n_channels, block_size) matrix in mV
+                traces_value = my_picoscope.get_block_traces_bulk()
+                traces_mean = traces_value.mean(axis=2)
+                traces_std = traces_value.std(axis=2)
+                print(f'{N_CAPTURES} captures, trace mean of the last one: ', traces_mean[-1],
+                      '\nTrace std of the last one:', traces_std[-1])
+                print('Waiting for next traces...')
+        except KeyboardInterrupt:
+            print('Picoscope logging terminated by keyboard interrupt')
+
+
+if __name__ == '__main__':
+    main()
@@ -6,14 +6,123 @@
 # In summary simply copy the picosdk directory from the link above and run the setup.py file to install driver bindings
 
 import ctypes
+import math
 from math import floor, log2
+import signal
 import sys
 import numpy as np
 from picosdk.ps4000a import ps4000a as ps
-from picosdk.functions import adc2mV, assert_pico_ok, mV2adc
+from picosdk.functions import assert_pico_ok
 import time
-import matplotlib.pyplot as plt
-from multiprocessing import Process
+import threading
+import traceback
+import queue
+from multiprocessing import Process, Queue, shared_memory
+
+
+def block_stats(traces_value):
+    """
+    Mean and standard deviation of each trace (row) of a block, reusing the mean for the std instead of
+    computing it twice.
+
+    Args:
+        - traces_value: 2D array-like of shape (n_channels, block_size)
+
+    Return:
+        - (traces_mean, traces_std), each of shape (n_channels,)
+    """
+    traces_value = np.asarray(traces_value)
+    traces_mean = np.mean(traces_value, axis=1)
+    try:
+        traces_std = np.std(traces_value, axis=1, mean=traces_mean[:, None])
+    except TypeError:
+        # numpy < 2.0 has no mean argument: remove the mean and accumulate the squares in float64,
+        # E[x^2] - E[x]^2 in float32 would cancel out any std below ~0.5 mV on a 1.5 V trace
+        d = traces_value - traces_mean[:, None]
+        traces_std = np.sqrt(np.einsum('ij,ij->i', d, d, dtype=np.float64) / traces_value.shape[1]).astype(traces_mean.dtype)
+    return traces_mean, traces_std
+
+
+#numba kernel fusing the ADC to mV conversion and the stats, compiled on first use (False if numba is not installed)
+_block_stats_i16_kernel = None
+
+
+def _get_block_stats_i16_kernel():
+    """
+    Import numba and compile the kernel lazily, so that importing this module stays cheap for processes that never need it.
+    """
+    global _block_stats_i16_kernel
+    if _block_stats_i16_kernel is None:
+        try:
+            # optional: numba fuses the ADC to mV conversion and the stats into a single pass over the block
+            from numba import njit, prange
+        except ImportError:
+            _block_stats_i16_kernel = False
+            return _block_stats_i16_kernel
+
+        @njit(parallel=True, fastmath=True, cache=True)
+        def kernel(block, scale, mean_out, std_out):
+            n_channels, n = block.shape
+            for c in prange(n_channels):
+                s = 0.0
+                s2 = 0.0
+                k = float(scale[c])
+                for i in range(n):
+                    v = block[c, i] * k
+                    s += v
+                    s2 += v * v
+                m = s / n
+                mean_out[c] = m
+                std_out[c] = math.sqrt(max(s2 / n - m * m, 0.0))
+
+        _block_stats_i16_kernel = kernel
+    return _block_stats_i16_kernel
+
+
+def block_stats_i16(block, scale):
+    """
+    Mean and standard deviation in mV of each trace (row) of a raw int16 block. With numba installed this is a 
+    single fused pass over the block without temporaries, otherwise it falls back to NumPy.
+
+    Args:
+        - block: C-contiguous int16 array of shape (n_channels, block_size), in ADC counts
+        - scale: float array of shape (n_channels,), mV per ADC count of each channel
+
+    Return:
+        - (traces_mean, traces_std), each of shape (n_channels,) and of the dtype of block * scale
+    """
+    kernel = _get_block_stats_i16_kernel()
+    if not kernel:
+        return block_stats(block * scale[:, None])
+    # accumulate in float64 inside the kernel, store in the same dtype as the NumPy fallback
+    dtype = np.result_type(block.dtype, scale.dtype)
+    traces_mean = np.empty(block.shape[0], dtype=dtype)
+    traces_std = np.empty(block.shape[0], dtype=dtype)
+    kernel(block, scale, traces_mean, traces_std)
+    return traces_mean, traces_std
+
+
+def _stats_worker(shm_name, shape, scale, in_q, out_q):
+    """
+    Worker process for Picoscope.start_stats_worker: convert the int16 block shared through shm_name
+    to mV and push its (mean, std) on out_q every time a token is received on in_q. A None token stops the worker.
+    If the stats fail, the error is pushed on out_q instead, as a RuntimeError carrying the worker traceback, and the worker stops.
+    """
+    # Ctrl+C reaches every process of the console: let stop_stats_worker's None token drive shutdown
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    block = np.ndarray(shape, dtype=np.int16, buffer=shm.buf)
+    try:
+        while in_q.get() is not None:
+            try:
+                out_q.put(block_stats_i16(block, scale))
+            except Exception:
+                # the original exception may not be picklable, send its traceback instead
+                out_q.put(RuntimeError('stats worker failed:\n' + traceback.format_exc()))
+                break
+    finally:
+        del block
+        shm.close()
 
 
 class Picoscope:
@@ -43,19 +152,48 @@ class Picoscope:
                 raise e
             assert_pico_ok(status)
         
+        #persistent (n_channels, block_size) int16 data matrix registered with the driver once,
+        #self.buffers and self.mv_buffers hold per-channel row views into block_matrix and block_matrix_mv
+        self.block_matrix = None
+        self.block_matrix_mv = None
+        self._ch_index = {}
+        #rapid block mode: (n_captures, n_channels, block_size) int16 matrix, one segment per capture
+        self.n_captures = 1
+        self.bulk_matrix = None
+        self.bulk_matrix_mv = None
         self.buffers = {}
+        self.mv_buffers = {}
+        self.block_size = None
         self.active_channels = []
         #channel voltage range index as defined in ps4000a.py
         self.channel_ranges = {} 
+        #PS4000A_CHANNEL enum value of each channel, resolved once in setup_channel
+        self._ch_enum = {}
+        #mV per ADC count for each channel, cached so the conversion is a single multiply
+        self._scale = {}
+        #ADC counts per mV for each channel, used to convert trigger thresholds
+        self._adc_per_mv = {}
         #lookup list to convert range index to mV. Max of 50000 mV comes from datasheet.
         self.allowed_ranges = [10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000] 
 
+        #stats worker process, see start_stats_worker
+        self._stats_proc = None
+        self._stats_pending = False
+
+        #set by the driver's BlockReady callback when a block capture is complete
+        self._ready_event = threading.Event()
+        self._block_ready_status = None
+        # Convert the python function into a C function pointer, kept alive for the lifetime of the scope
+        self._block_ready_callback = ps.BlockReadyType(self._block_ready)
+
         self._get_max_ADC()
 
     def __enter__(self):
         pass
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
+        if self._stats_proc is not None:
+            self.stop_stats_worker()
         try:
             status = ps.ps4000aCloseUnit(self.c_handle)
             assert_pico_ok(status)
@@ -66,6 +204,13 @@ class Picoscope:
                 print('Picoscope was not closed successfully.')
             raise e
 
+    def _block_ready(self, handle, status, param):
+        """
+        BlockReady callback called by the driver from its own thread once the block has been captured.
+        """
+        self._block_ready_status = status
+        self._ready_event.set()
+
     def _get_max_ADC(self):
         """
         Query the maximum ADC count supported by the device which will be used in unit conversions later.
@@ -109,6 +254,8 @@ class Picoscope:
 
         channel_range = coerce_channel_range(channel_range_mv)
 
+        self._ch_enum[channel_name] = ps.PS4000A_CHANNEL['PS4000A_CHANNEL_' + channel_name]
+
         # Set up a channel
         # handle = chandle
         # channel = PS4000a_CHANNEL_A = 0
@@ -117,15 +264,58 @@ class Picoscope:
         # range = PS4000a_2V = 7
         # analogOffset = 0 V
         status = ps.ps4000aSetChannel(self.c_handle,
-                                      ps.PS4000A_CHANNEL['PS4000A_CHANNEL_' +
-                                                         channel_name],
+                                      self._ch_enum[channel_name],
                                       1,
                                       coupling_DC,
                                       channel_range,
                                       analog_offset)
         assert_pico_ok(status)
-        self.active_channels.append(channel_name)
+        # setting up an open channel again only updates its range and scale
+        if channel_name not in self.active_channels:
+            self.active_channels.append(channel_name)
         self.channel_ranges[channel_name] = channel_range
+        self._scale[channel_name] = np.float32(self.allowed_ranges[channel_range] / self.max_ADC.value)
+        self._adc_per_mv[channel_name] = self.max_ADC.value / self.allowed_ranges[channel_range]
+        # channels opened after setup_block need a row in the data matrix
+        if self.block_size is not None:
+            self._setup_data_buffers()
+
+    def _setup_data_buffers(self):
+        """
+        Allocate a persistent (n_channels, block_size) int16 matrix with one row per active channel and
+        register each row with the driver. The driver writes every subsequent block into this same 
+        contiguous matrix, so nothing is reallocated per trigger and the stats run on C-ordered memory.
+        """
+        n_channels = len(self.active_channels)
+        self.block_matrix = np.zeros((n_channels, self.block_size), dtype=np.int16)
+        self.block_matrix_mv = np.zeros((n_channels, self.block_size), dtype=np.float32)
+        self._ch_index = {channel: i for i, channel in enumerate(self.active_channels)}
+        # mV per ADC count of each row, so that all channels are converted with one broadcast multiply
+        self._scale_vec = np.array([self._scale[channel] for channel in self.active_channels], dtype=np.float32)
+        self.buffers = {channel: self.block_matrix[i] for channel, i in self._ch_index.items()}
+        self.mv_buffers = {channel: self.block_matrix_mv[i] for channel, i in self._ch_index.items()}
+        for channel, buffer in self.buffers.items():
+            # Set data buffer location for data collection from channel 
+            # handle = chandle
+            # source = PS4000A_CHANNEL_A = 0
+            # pointer to buffer max = row of self.block_matrix
+            # pointer to buffer min = None
+            # buffer length = maxSamples
+            # segment index = 0
+            # ratio mode = PS4000A_RATIO_MODE_NONE = 0
+            status = ps.ps4000aSetDataBuffers(self.c_handle,
+                                              self._ch_enum[channel],
+                                              buffer.ctypes.data_as(
+                                                  ctypes.POINTER(ctypes.c_int16)),
+                                              None,
+                                              self.block_size,
+                                              0,
+                                              ps.PS4000A_RATIO_MODE['PS4000A_RATIO_MODE_NONE'])
+            assert_pico_ok(status)
+        # in rapid block mode the segment 0 registration above replaced the bulk buffers: register them again
+        # so that they match the new channels and block size
+        if self.n_captures > 1:
+            self.setup_rapid_block(self.n_captures)
 
     def setup_trigger(self, source_channel_name, trigger_threshold_mv=100, 
                         trigger_direction=2, trigger_delay=0, auto_trigger=0):
@@ -144,16 +334,16 @@ class Picoscope:
             Convert user input trigger threshold in mv to ADC counts
             """
             try:
-                source_channel_range = self.channel_ranges[source_channel_name]
+                source_channel_range_mv = self.allowed_ranges[self.channel_ranges[source_channel_name]]
             except KeyError:
                 print((f'[PS4842a configuration error]: channel {source_channel_name} not found. '
                         'Setup all channels before setting a trigger.\n \nProgram aborted.'))
                 sys.exit()
-            if self.allowed_ranges[source_channel_range] <= trigger_threshold_mv:
+            if source_channel_range_mv <= trigger_threshold_mv:
                 print('[PS4842a configuration error]: trigger threshold is higher than the channel range.\n',
                         'Program aborted.')
                 sys.exit()
-            return mV2adc(trigger_threshold_mv, source_channel_range, self.max_ADC)
+            return round(trigger_threshold_mv * self._adc_per_mv[source_channel_name])
         
         trigger_threshold = convert_trigger_units(trigger_threshold_mv)
         # Set up single trigger
@@ -166,8 +356,7 @@ class Picoscope:
         # auto Trigger = 1000 ms           
         status = ps.ps4000aSetSimpleTrigger(self.c_handle,
                                             1,
-                                            ps.PS4000A_CHANNEL['PS4000A_CHANNEL_' +
-                                                                source_channel_name],
+                                            self._ch_enum[source_channel_name],
                                             trigger_threshold,
                                             trigger_direction,
                                             trigger_delay,
@@ -193,10 +382,7 @@ class Picoscope:
             """
             sampling_rate = (block_size-1) / block_duration # in Samples /s
             timebase = floor(400e6 / sampling_rate)-1 # see documentation for definition
-            if 0 <= timebase <= 2e32 - 1:
-                print((f'Configured PS4824a to take blocks of {block_size} samples at {sampling_rate*1e-3:.3f} kS/s,'
-                f'each lasting {(block_size-1)/sampling_rate:.3f} s\n'))
-            else:
+            if not 0 <= timebase <= 2e32 - 1:
                 print((f'[PS4842a configuration error]: sampling rate of {sampling_rate*1e-3:.3f} kS/s is out of bound.\n'
                         f'Coerced to taking blocks of {block_size} samples at 100 kS/s, each lasting'
                         f'{(block_size-1)/100e3:.3f} s\n'))
@@ -227,32 +413,82 @@ class Picoscope:
                                         ctypes.byref(returned_block_size), 
                                         0)
         assert_pico_ok(status)
+        # actual sampling rate (in Samples /s) and block duration (in s), from the sample interval reported by the driver
+        self.sampling_rate = 1e9 / time_interval_ns.value
+        self.block_duration_actual = (block_size-1) / self.sampling_rate
+        if self.verbose:
+            print((f'Configured PS4824a to take blocks of {block_size} samples at {self.sampling_rate*1e-3:.3f} kS/s,'
+                    f'each lasting {self.block_duration_actual:.3f} s\n'))
 
+        # (re)allocate the data matrix only when the block size changes
+        if self.block_matrix is None or self.block_matrix.shape != (len(self.active_channels), self.block_size):
+            self._setup_data_buffers()
 
-    def run_block(self):
+    def setup_rapid_block(self, n_captures):
         """
-        Call this function after the device is configured to prepare fresh buffers for capturing a new data block, and to start this capture
+        Split the device memory into n_captures segments so that a single run_block captures n_captures
+        successive triggers, which are then retrieved together with get_block_traces_bulk. This amortizes 
+        the driver call overhead over n_captures blocks. Must setup the channels and the block first!
+        Once configured, use get_block_traces_bulk instead of get_block_traces. Call with n_captures=1
+        to go back to single block mode.
+        Args:
+            - n_captures: number of triggered blocks to capture per run_block call
         """
-        # Create buffers ready for assigning pointers for data collection
-        # Set data buffer location for data collection from channel_name 
+        if self.block_size is None:
+            print('[PS4842a configuration error]: setup the block before setting up rapid block mode.\n \nProgram aborted.')
+            sys.exit()
+        # Segment the memory
         # handle = chandle
-        # source = PS4000A_CHANNEL_A = 0
-        # pointer to buffer max = ctypes.byref(bufferAMax)
-        # pointer to buffer min = ctypes.byref(bufferAMin)
-        # buffer length = maxSamples
-        # segment index = 0
-        # ratio mode = PS4000A_RATIO_MODE_NONE = 0
-        for channel in self.active_channels:
-            self.buffers[channel] = (ctypes.c_int16 * self.block_size)()
-            status = ps.ps4000aSetDataBuffers(self.c_handle,
-                                            ps.PS4000A_CHANNEL['PS4000A_CHANNEL_' +
-                                                                channel],
-                                            ctypes.byref(self.buffers[channel]),
-                                            None,
-                                            self.block_size,
-                                            0,
-                                            ps.PS4000A_RATIO_MODE['PS4000A_RATIO_MODE_NONE'])
+        # nSegments = n_captures
+        # pointer to nMaxSamples = ctypes.byref(max_samples_per_segment)
+        max_samples_per_segment = ctypes.c_int32()
+        status = ps.ps4000aMemorySegments(self.c_handle, n_captures, ctypes.byref(max_samples_per_segment))
         assert_pico_ok(status)
+        if max_samples_per_segment.value < self.block_size:
+            print((f'[PS4842a configuration error]: {n_captures} captures of {self.block_size} samples do not fit in memory '
+                    f'({max_samples_per_segment.value} samples per segment).\n \nProgram aborted.'))
+            sys.exit()
+
+        # Set number of captures
+        # handle = chandle
+        # nCaptures = n_captures
+        status = ps.ps4000aSetNoOfCaptures(self.c_handle, n_captures)
+        assert_pico_ok(status)
+        self.n_captures = n_captures
+
+        if n_captures == 1:
+            # back to single block mode: point segment 0 at block_matrix again
+            self.bulk_matrix = None
+            self.bulk_matrix_mv = None
+            self._setup_data_buffers()
+            return
+
+        n_channels = len(self.active_channels)
+        self.bulk_matrix = np.zeros((n_captures, n_channels, self.block_size), dtype=np.int16)
+        self.bulk_matrix_mv = np.zeros((n_captures, n_channels, self.block_size), dtype=np.float32)
+        for segment in range(n_captures):
+            for channel, i in self._ch_index.items():
+                # Set data buffer location for data collection from channel in segment
+                # handle = chandle
+                # source = PS4000A_CHANNEL_A = 0
+                # pointer to buffer = row of self.bulk_matrix
+                # buffer length = maxSamples
+                # segment index = segment
+                # ratio mode = PS4000A_RATIO_MODE_NONE = 0
+                status = ps.ps4000aSetDataBuffer(self.c_handle,
+                                                 self._ch_enum[channel],
+                                                 self.bulk_matrix[segment, i].ctypes.data_as(
+                                                     ctypes.POINTER(ctypes.c_int16)),
+                                                 self.block_size,
+                                                 segment,
+                                                 ps.PS4000A_RATIO_MODE['PS4000A_RATIO_MODE_NONE'])
+                assert_pico_ok(status)
+
+    def run_block(self):
+        """
+        Call this function after the device is configured to start the capture of a new data block.
+        The data buffers are registered once in setup_block and reused for every block.
+        """
         # Run block capture
         # handle = chandle
         # number of pre-trigger samples = preTriggerSamples
@@ -260,29 +496,30 @@ class Picoscope:
         # timebase = 3 = 80 ns = timebase (see Programmer's guide for mre information on timebases)
         # time indisposed ms = None (not needed in the example)
         # segment index = 0
-        # lpReady = None (using ps4000aIsReady rather than ps4000aBlockReady)
+        # lpReady = self._block_ready_callback (driver signals completion instead of polling ps4000aIsReady)
         # pParameter = None
+        self._ready_event.clear()
         status = ps.ps4000aRunBlock(self.c_handle,
                                     self.pre_trigger_samples,
                                     self.post_trigger_samples,
                                     self.timebase,
                                     None,
                                     0,
-                                    None,
+                                    self._block_ready_callback,
                                     None)
         assert_pico_ok(status)
 
-    def get_block_traces(self):
+    def _transfer_block(self):
         """
-        Check and transfer data block when captured.
-
-        Return: dict{key: list} where key is the channel name and list is the captured data trace on this channel.
+        Wait for the block capture to finish and transfer the int16 data into self.block_matrix.
         """
-        # Check for data collection to finish using ps4000aIsReady
-        ready = ctypes.c_int16(0)
-        check = ctypes.c_int16(0)
-        while ready.value == check.value:
-            status_temp = ps.ps4000aIsReady(self.c_handle, ctypes.byref(ready))
+        if self.n_captures > 1:
+            raise RuntimeError('rapid block mode is configured, use get_block_traces_bulk or call setup_rapid_block(1) first')
+        # Wait for the BlockReady callback to signal that data collection has finished.
+        # Wait in short slices so that a KeyboardInterrupt can still get through.
+        while not self._ready_event.wait(0.1):
+            pass
+        assert_pico_ok(self._block_ready_status)
         # create overflow loaction
         overflow = ctypes.c_int16()
         # create converted type maxSamples
@@ -296,21 +533,133 @@ class Picoscope:
                                     ctypes.byref(overflow))
         assert_pico_ok(status)
 
+    def get_block_traces(self):
+        """
+        Check and transfer data block when captured.
+
+        Return: C-contiguous float32 np.ndarray of shape (n_channels, block_size) holding the captured data traces in mV,
+                channels ordered as in self.active_channels (self.mv_buffers maps channel names to its rows).
+                The array is overwritten by the next call, copy it if it needs to be kept.
+        """
+        self._transfer_block()
+
         def convert_ADC_units():
-            # Convert ADC counts data to mV
-            self.buffers = {chl: adc2mV(buffer, self.channel_ranges[chl], self.max_ADC) for
-                            chl, buffer in self.buffers.items()}
+            # Convert ADC counts data to mV for all channels at once, keeping the raw int16 buffers intact for the next block
+            np.multiply(self.block_matrix, self._scale_vec[:, None], out=self.block_matrix_mv)
             self.voltage_unit = 'mV'
         convert_ADC_units()
 
         # #TODO temporary figure stuff do this properly later
         # if show_traces: 
+        #     import matplotlib.pyplot as plt # imported lazily, pyplot is slow to import
         #     fig, ax = plt.subplots()
         #     sample_id = np.linspace(1, self.block_size, self.block_size) #change this to timestamps later
-        #     sample_values = [chl for chl in self.buffers.values()]
-        #     for chl in sample_values:
+        #     for chl in self.block_matrix_mv:
         #         ax.plot(sample_id, chl)
         #     fig.show()
 
-        return self.buffers
+        assert self.block_matrix_mv.flags.c_contiguous
+        return self.block_matrix_mv
+
+    def get_block_traces_bulk(self):
+        """
+        Wait for all the blocks of a rapid block capture (see setup_rapid_block) and transfer them in one driver call.
+
+        Return: np.ndarray of shape (n_captures, n_channels, block_size) holding the captured data traces in mV,
+                channels ordered as in self.active_channels. The array is overwritten by the next call, copy it if it needs to be kept.
+        """
+        if self.n_captures == 1 or self.bulk_matrix is None:
+            raise RuntimeError('rapid block mode is not configured, call setup_rapid_block first or use get_block_traces')
+        # The BlockReady callback fires once all the segments have been captured
+        while not self._ready_event.wait(0.1):
+            pass
+        assert_pico_ok(self._block_ready_status)
+        # create overflow location, one per segment
+        overflow = (ctypes.c_int16 * self.n_captures)()
+        # create converted type maxSamples
+        cmaxSamples = ctypes.c_uint32(self.block_size)
+        # handle = chandle
+        # pointer to noOfSamples = ctypes.byref(cmaxSamples)
+        # fromSegmentIndex = 0
+        # toSegmentIndex = n_captures - 1
+        # downSampleRatio = 1
+        # downSampleRatioMode = PS4000A_RATIO_MODE_NONE = 0
+        # pointer to overflow = ctypes.byref(overflow)
+        status = ps.ps4000aGetValuesBulk(self.c_handle,
+                                         ctypes.byref(cmaxSamples),
+                                         0,
+                                         self.n_captures - 1,
+                                         1,
+                                         ps.PS4000A_RATIO_MODE['PS4000A_RATIO_MODE_NONE'],
+                                         ctypes.byref(overflow))
+        assert_pico_ok(status)
+
+        # Convert ADC counts data to mV for all the captures at once
+        np.multiply(self.bulk_matrix, self._scale_vec[:, None], out=self.bulk_matrix_mv)
+        self.voltage_unit = 'mV'
+
+        return self.bulk_matrix_mv
+
+    def start_stats_worker(self):
+        """
+        Start a worker process computing the mean and std in mV of each channel, so that the arithmetic overlaps
+        with the wait for the next trigger. Must setup the channels and the block first! Usage:
+
+            run_block()
+            while True:
+                submit_block_stats()    # transfer the block and hand it to the worker
+                run_block()             # re-arm the scope right away
+                traces_mean, traces_std = get_block_stats()
+
+        The worker is stopped by stop_stats_worker, or when leaving the `with` block.
+        """
+        self._stats_shm = shared_memory.SharedMemory(create=True, size=self.block_matrix.nbytes)
+        self._stats_block = np.ndarray(self.block_matrix.shape, dtype=np.int16, buffer=self._stats_shm.buf)
+        self._stats_in_q, self._stats_out_q = Queue(), Queue()
+        self._stats_proc = Process(target=_stats_worker,
+                                   args=(self._stats_shm.name, self.block_matrix.shape, self._scale_vec,
+                                         self._stats_in_q, self._stats_out_q),
+                                   daemon=True)
+        self._stats_proc.start()
+        self._stats_pending = False
 
+    def submit_block_stats(self):
+        """
+        Wait for the current block, transfer it and hand it over to the stats worker (see start_stats_worker).
+        The stats of the previous block must have been collected with get_block_stats first.
+        """
+        if self._stats_pending:
+            raise RuntimeError('call get_block_stats before submitting the next block')
+        self._transfer_block()
+        np.copyto(self._stats_block, self.block_matrix)
+        self._stats_in_q.put(0)
+        self._stats_pending = True
+
+    def get_block_stats(self):
+        """
+        Return: (traces_mean, traces_std) in mV of the last submitted block, each of shape (n_channels,)
+                with channels ordered as in self.active_channels.
+        """
+        # poll so that a worker that died without answering raises instead of hanging the acquisition loop
+        while True:
+            try:
+                stats = self._stats_out_q.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if not self._stats_proc.is_alive():
+                    raise RuntimeError(f'stats worker exited with code {self._stats_proc.exitcode}')
+        self._stats_pending = False
+        if isinstance(stats, Exception):
+            raise stats
+        return stats
+
+    def stop_stats_worker(self):
+        """
+        Stop the stats worker process and release its shared memory.
+        """
+        self._stats_in_q.put(None)
+        self._stats_proc.join()
+        self._stats_proc = None
+        del self._stats_block
+        self._stats_shm.close()
+        self._stats_shm.unlink()
@@ -4,47 +4,62 @@
 import pyqtgraph as pg
 from pyqtgraph.Qt import QtCore, QtGui
 import numpy as np
-from ps4824a_wrapper_blockmode_utils import Picoscope
+from ps4824a_wrapper_blockmode_utils import Picoscope, block_stats
+from multiprocessing import Event, Process, Value, shared_memory
 import sys
 
-my_picoscope = Picoscope(0, verbose=True)
-my_picoscope.setup_channel('A',channel_range_mv=2000)
-my_picoscope.setup_channel('B',channel_range_mv=2000)
-my_picoscope.setup_block(block_size=100, block_duration=1e-4, pre_trigger_percent=0)
-my_picoscope.setup_trigger('B',trigger_threshold_mv=1500)
+#ring buffer holding the last N_VISIBLE trace means, the oldest point is overwritten once full.
+#It lives in shared memory: the acquisition process writes it, the GUI process only reads it.
+N_VISIBLE = 1000
+#maximum plot refresh rate, independent of the trigger rate
+REFRESH_RATE_HZ = 30
+#time given to the acquisition process to finish its current block and close the scope, in s
+STOP_TIMEOUT = 2
+
+
+def pico_run(shm_name, head, stop):
+    """
+    Acquisition process that arms the trigger on PS4824a and writes the mean of the first channel of every block
+    into the shared ring buffer. Running in its own process keeps both the long wait time between
+    successive triggers and the GIL from freezing the GUI.
+    Args:
+        - shm_name: name of the shared memory block backing the ring buffer
+        - head: multiprocessing.Value counting the points written so far
+        - stop: multiprocessing.Event set by the GUI to end the acquisition and close the scope
+    """
+    my_picoscope = Picoscope(0, verbose=True)
+    my_picoscope.setup_channel('A',channel_range_mv=2000)
+    my_picoscope.setup_channel('B',channel_range_mv=2000)
+    my_picoscope.setup_block(block_size=100, block_duration=1e-4, pre_trigger_percent=0)
+    my_picoscope.setup_trigger('B',trigger_threshold_mv=1500)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    data = np.ndarray((N_VISIBLE,), dtype=np.float64, buffer=shm.buf)
+    with my_picoscope:
+        while not stop.is_set():
+            my_picoscope.run_block()
+            traces_value = my_picoscope.get_block_traces()
+            traces_mean, traces_std = block_stats(traces_value)
+            # write the point before publishing it by incrementing head
+            data[head.value % N_VISIBLE] = traces_mean[0]
+            head.value += 1
 
-data = np.empty(100)
-ptr = 0
 
-class PicoWorker(QtCore.QObject):
-    triggered = QtCore.pyqtSignal()
-    def pico_run(self):
+class PicoTrace(pg.GraphicsLayoutWidget):
+    def __init__(self, data, head, pico_process):
         """
-        Worker function that arms the trigger on PS4824a to prepare for data acquisition. 
-        This function should always be called with multithreading to prevent the long wait time between
-        successive triggers from freezing the GUI.
+        Args:
+            - data: ring buffer (view over the shared memory block)
+            - head: multiprocessing.Value counting the points written so far
+            - pico_process: acquisition process, watched to report a failure
         """
-        global my_picoscope, data, ptr
-        while True:
-            my_picoscope.run_block()
-            buffers = my_picoscope.get_block_traces()
-            traces_value = [val for val in buffers.values()]
-            traces_mean, traces_std = np.mean(traces_value, axis = 1), np.std(traces_value, axis = 1)
-            data[ptr] = traces_mean[0]
-            ptr += 1
-            if ptr >= data.shape[0]:
-                tmp = data
-                data = np.empty(data.shape[0] * 2)
-                data[:tmp.shape[0]] = tmp
-            self.triggered.emit()
-
-        
-class PicoTrace(pg.GraphicsLayoutWidget):
-    def __init__(self):
         super().__init__()
+        self.data = data
+        self.head = head
+        self.pico_process = pico_process
         self.setup_gui()
         self.update_trace()
-    
+
     def setup_gui(self):
         pg.setConfigOptions(antialias=True)
         self.resize(1920,400)
@@ -54,27 +69,66 @@ class PicoTrace(pg.GraphicsLayoutWidget):
         self.panel1.setDownsampling(mode='peak')
         self.panel1.setClipToView(True)
         self.curve1 = self.panel1.plot(pen='w', symbolBrush='r', symbolPen='w')
-        
-    def update_trace(self):
-        self.thread = QtCore.QThread()
-        self.worker = PicoWorker()
-        self.worker.moveToThread(self.thread)
-        self.thread.started.connect(self.worker.pico_run)
-        self.worker.triggered.connect(lambda: self.curve1.setData(data[:ptr]))
-        self.thread.start()      
-
-app = QtGui.QApplication(sys.argv)
-win = PicoTrace()
-win.show()
-sys.exit(app.exec())
-
-
-
-
-
-
-
-
-
 
+    def visible_data(self):
+        """
+        Return a chronological snapshot of the filled part of the ring buffer. Points overwritten by the
+        acquisition process while copying are dropped, seqlock-style, so no lock is needed.
+        """
+        h = self.head.value
+        if h < N_VISIBLE:
+            return self.data[:h].copy()
+        start = h % N_VISIBLE
+        snapshot = np.concatenate((self.data[start:], self.data[:start]))
+        # the slot at head may be being written before head is incremented, so always treat it as dirty
+        overwritten = min(self.head.value - h + 1, N_VISIBLE)
+        return snapshot[overwritten:]
 
+    def update_trace(self):
+        """
+        Redraw the plot from a QTimer at most REFRESH_RATE_HZ times per second, only if new points arrived.
+        """
+        self.last_head = 0
+        self.timer = QtCore.QTimer()
+        self.timer.timeout.connect(self._update)
+        self.timer.start(int(1000 / REFRESH_RATE_HZ))
+
+    def _update(self):
+        if not self.pico_process.is_alive():
+            # e.g. no scope found: the traceback is in the console, stop refreshing and say so in the window
+            self.timer.stop()
+            message = f'acquisition process exited with code {self.pico_process.exitcode}'
+            print(message)
+            self.setWindowTitle(f'PS4824a Block Mode with Trigger - {message}')
+            return
+        if self.head.value == self.last_head:
+            return
+        self.last_head = self.head.value
+        self.curve1.setData(self.visible_data())
+
+
+if __name__ == '__main__':
+    shm = shared_memory.SharedMemory(create=True, size=N_VISIBLE * np.dtype(np.float64).itemsize)
+    data = np.ndarray((N_VISIBLE,), dtype=np.float64, buffer=shm.buf)
+    head = Value('Q', 0)
+    stop = Event()
+    pico_process = Process(target=pico_run, args=(shm.name, head, stop), daemon=True)
+    pico_process.start()
+
+    app = QtGui.QApplication(sys.argv)
+    win = PicoTrace(data, head, pico_process)
+    win.show()
+    exit_code = app.exec()
+
+    # let the acquisition loop finish its block and leave the with block, which closes the scope.
+    # Without triggers it stays blocked waiting for the block, so terminate it as a last resort.
+    stop.set()
+    pico_process.join(STOP_TIMEOUT)
+    if pico_process.is_alive():
+        print('No trigger received, the acquisition process is terminated without closing the scope.')
+        pico_process.terminate()
+        pico_process.join()
+    del win, data
+    shm.close()
+    shm.unlink()
+    sys.exit(exit_code)
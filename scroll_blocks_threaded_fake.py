@@ -4,11 +4,29 @@ import pyqtgraph as pg
 from pyqtgraph.Qt import QtCore, QtGui
 import numpy as np
 import sys
+import threading
 import time
 
 #Simulate data acquisition on two channels
-data = np.empty((100,2))
-ptr = 0
+#maximum plot refresh rate, independent of the trigger rate
+REFRESH_RATE_HZ = 30
+#ring buffer holding the last N_VISIBLE points, the oldest point is overwritten once full
+N_VISIBLE = 1000
+data = np.empty((N_VISIBLE,2))
+head = 0
+count = 0
+#guards data, head and count: a point is written and published atomically for the GUI thread
+data_lock = threading.Lock()
+
+
+def visible_data():
+    """
+    Return a copy of the filled part of the ring buffer in chronological order.
+    """
+    with data_lock:
+        if count < N_VISIBLE:
+            return data[:count].copy()
+        return np.concatenate((data[head:], data[:head]))
 
 
 class PicoWorker(QtCore.QObject):
@@ -19,15 +37,14 @@ class PicoWorker(QtCore.QObject):
         This function should always be called with multithreading to prevent the long wait time between
         successive triggers from freezing the GUI.
         """
-        global data, ptr
+        global head, count
         while True:
             time.sleep(0.5) #simulate long wait times between scope triggers
-            data[ptr] = np.random.normal(size=2) 
-            ptr += 1
-            if ptr >= data.shape[0]:
-                tmp = data
-                data = np.empty((data.shape[0] * 2, 2))
-                data[:tmp.shape[0]] = tmp
+            point = np.random.normal(size=2)
+            with data_lock:
+                data[head] = point
+                head = (head + 1) % N_VISIBLE
+                count = min(count + 1, N_VISIBLE)
             self.triggered.emit() #pyqt signal to update the plot in the GUI
         
 class PicoTrace(pg.GraphicsLayoutWidget):
@@ -56,16 +73,34 @@ class PicoTrace(pg.GraphicsLayoutWidget):
 
     def update_trace(self):
         """
-        Use QThread to move picoscope onto a different thread.
+        Use QThread to move picoscope onto a different thread. Triggers only mark the plot as stale,
+        the curves are redrawn by a timer at most REFRESH_RATE_HZ times per second.
         """
+        self.stale = False
         self.thread = QtCore.QThread()
         self.worker = PicoWorker()
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.pico_run)
-        self.worker.triggered.connect(lambda: self.curve1.setData(data[:ptr, 0]))
-        self.worker.triggered.connect(lambda: self.curve2.setData(data[:ptr, 1]))
+        self.worker.triggered.connect(self._mark_stale)
+        self.timer = QtCore.QTimer()
+        self.timer.timeout.connect(self._update)
+        self.timer.start(int(1000 / REFRESH_RATE_HZ))
         self.thread.start()      
 
+    def _mark_stale(self):
+        self.stale = True
+
+    def _update(self):
+        """
+        Redraw both curves from a single snapshot of the ring buffer.
+        """
+        if not self.stale:
+            return
+        self.stale = False
+        s = visible_data()
+        self.curve1.setData(s[:, 0])
+        self.curve2.setData(s[:, 1])
+
 app = QtGui.QApplication(sys.argv)
 win = PicoTrace()
 win.show()